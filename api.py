@@ -1,12 +1,20 @@
 from fastapi import FastAPI, BackgroundTasks, Query, HTTPException, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Set
+from datetime import date, timedelta
+from itertools import groupby
+from urllib.parse import quote
 import uuid
 import time # Solo para el ejemplo de sleep
 import json
-from fixture_generator import FixtureGenerator
+import os
+import pickle
+import tempfile
+import fixture_store
+import fixture_export
+import fixture_dias
 
 
 # ==========================================
@@ -43,6 +51,19 @@ class JobStatusDTO(BaseModel):
     status: str
     message: str
 
+class PartidoFechaDTO(BaseModel):
+    liga: str
+    nroFecha: int
+    local: str
+    visitante: str
+    cancha: str
+
+class VersionDTO(BaseModel):
+    id: int
+    jobId: str
+    creado: str
+    status: str
+
 # ==========================================
 # 2. Configuración de la App FastAPI
 # ==========================================
@@ -65,24 +86,96 @@ jobs_status = {}
 fixtures_db = [] 
 equipos_db = []
 
-def init_db():
-    global equipos_db, fixtures_db
-    # Cargar equipos
+# Snapshot binario de lo que init_db() parsea de los JSON. Se invalida solo
+# cuando cambia el mtime o el tamaño de alguno de los archivos fuente.
+SNAPSHOT_PATH = "startup.snapshot"
+SNAPSHOT_FUENTES = ["equipos.json", "fixture.json"]
+
+def _firma_fuentes():
+    firma = []
+    for path in SNAPSHOT_FUENTES:
+        try:
+            st = os.stat(path)
+            firma.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            firma.append((path, None, None))
+    return firma
+
+class _SoloDatosUnpickler(pickle.Unpickler):
+    """
+    El snapshot vive en el directorio de trabajo (escribible), así que no
+    confiamos en su contenido: solo se aceptan dicts, listas, strings,
+    números, bools y None. Cualquier referencia a una clase o función
+    (la vía para ejecutar código con pickle) hace fallar la carga y
+    init_db() vuelve a leer los JSON.
+    """
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Global no permitido en {SNAPSHOT_PATH}: {module}.{name}")
+
+def leer_snapshot():
     try:
-        with open("equipos.json", "r", encoding="utf-8") as file:
-            data = json.load(file)
-            equipos_db = data.get("equipos", [])
-            print(f"Equipos cargados: {len(equipos_db)}")
-    except Exception as e:
-        print(f"Error loading equipos.json: {e}")
-        
-    # Cargar fixture generado previamente
+        with open(SNAPSHOT_PATH, "rb") as file:
+            snapshot = _SoloDatosUnpickler(file).load()
+    except Exception:
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("firma") != _firma_fuentes():
+        return None
+    return snapshot
+
+def guardar_snapshot():
+    # Archivo temporal único por proceso en el mismo directorio: varios workers
+    # arrancando a la vez escriben cada uno el suyo y os.replace los publica
+    # atómicamente, así nadie lee un snapshot a medias
+    tmp_path = None
     try:
-        with open("fixture.json", "r", encoding="utf-8") as file:
-            fixtures_db = json.load(file)
-            print(f"Fixture cargado desde archivo: {len(fixtures_db)} fechas")
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(SNAPSHOT_PATH)),
+                                        prefix=SNAPSHOT_PATH + ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump({
+                "firma": _firma_fuentes(),
+                "equipos": equipos_db,
+                "fixture": fixtures_db,
+            }, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, SNAPSHOT_PATH)
     except Exception as e:
-        print(f"No se pudo cargar fixture.json (puede que no exista aún): {e}")
+        print(f"No se pudo guardar {SNAPSHOT_PATH}: {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def init_db():
+    global equipos_db, fixtures_db
+
+    snapshot = leer_snapshot()
+    if snapshot is not None:
+        equipos_db = snapshot["equipos"]
+        fixtures_db = snapshot["fixture"]
+        print(f"Estado inicial cargado desde {SNAPSHOT_PATH}: {len(equipos_db)} equipos, {len(fixtures_db)} fechas")
+    else:
+        # Cargar equipos
+        try:
+            with open("equipos.json", "r", encoding="utf-8") as file:
+                data = json.load(file)
+                equipos_db = data.get("equipos", [])
+                print(f"Equipos cargados: {len(equipos_db)}")
+        except Exception as e:
+            print(f"Error loading equipos.json: {e}")
+            
+        # Cargar fixture generado previamente
+        try:
+            with open("fixture.json", "r", encoding="utf-8") as file:
+                fixtures_db = json.load(file)
+                print(f"Fixture cargado desde archivo: {len(fixtures_db)} fechas")
+        except Exception as e:
+            print(f"No se pudo cargar fixture.json (puede que no exista aún): {e}")
+
+        guardar_snapshot()
+
+    # Base SQLite con los fixtures versionados. Si está vacía, la sembramos con fixture.json
+    fixture_store.init_store()
+    if fixtures_db:
+        version_id = fixture_store.sembrar_si_vacio("fixture.json", fixtures_db, "INICIAL")
+        if version_id is not None:
+            print(f"Fixture inicial guardado en la base (versión {version_id})")
 
 init_db() 
 
@@ -97,11 +190,20 @@ def proceso_ortools_async(job_id: str):
     print(f"[BACKGROUND] Iniciando trabajo {job_id}...")
     
     try:
+        # Import diferido: OR-Tools tarda en cargar y los workers que solo
+        # sirven lecturas no lo necesitan. Se paga recién en la primera generación.
+        from fixture_generator import FixtureGenerator
+
         generator = FixtureGenerator("equipos.json")
         fechas, status_name = generator.solve()
         
         # Guardamos en nuestra mini bd
         if fechas is not None:
+            # Primero la base (transaccional): si falla, el job queda FAILED y
+            # fixture.json / fixtures_db siguen con el fixture anterior
+            version_id = fixture_store.guardar_fixture(job_id, fechas, status_name)
+            print(f"[BACKGROUND] Fixture guardado en la base (versión {version_id})")
+
             fixtures_db.clear()
             fixtures_db.extend(fechas)
             
@@ -110,6 +212,7 @@ def proceso_ortools_async(job_id: str):
                 with open("fixture.json", "w", encoding="utf-8") as f:
                     json.dump(fechas, f, indent=4, ensure_ascii=False)
                 print("[BACKGROUND] Fixture persistido en fixture.json")
+                guardar_snapshot()
             except Exception as ef:
                 print(f"[BACKGROUND] Error al persistir fixture.json: {ef}")
 
@@ -188,11 +291,12 @@ def load_equipos_categorias():
         print(f"Error loading equipos.json: {e}")
     return categorias_map
 
-@app.get("/fixture", response_model=List[FechaDTO])
-async def obtener_fixture(liga: str, categoria: str):
-    liga_key = liga.strip().upper()
-    categoria_key = categoria.strip().upper()
-    
+def resolver_categoria(liga_key: str, categoria_key: str):
+    """
+    Traduce una categoría del frontend (e.g. QUINTA) a la key de equipos.json
+    y a la división del fixture donde se juega (e.g. JUVENILES-A).
+    Devuelve (None, None) si la categoría no existe.
+    """
     cat_json_map = {
         "PRIMERA": "primera",
         "RESERVA": "reserva",
@@ -211,7 +315,7 @@ async def obtener_fixture(liga: str, categoria: str):
     
     json_cat = cat_json_map.get(categoria_key)
     if not json_cat:
-        return []
+        return None, None
 
     if categoria_key in ["PRIMERA", "RESERVA"]:
         target_div = f"MAYORES-{liga_key}"
@@ -221,45 +325,47 @@ async def obtener_fixture(liga: str, categoria: str):
         target_div = f"INFANTILES-{liga_key}"
     elif categoria_key in ["FEM_PRIMERA", "FEM_SUB16"]:
         target_div = "FEMENINO MAYORES-A"
-    elif categoria_key in ["FEM_SUB14", "FEM_SUB12"]:
-        target_div = "FEMENINO MENORES-A"
     else:
+        target_div = "FEMENINO MENORES-A"
+
+    return json_cat, target_div
+
+@app.get("/fixture", response_model=List[FechaDTO])
+def obtener_fixture(liga: str, categoria: str):
+    liga_key = liga.strip().upper()
+    categoria_key = categoria.strip().upper()
+    
+    json_cat, target_div = resolver_categoria(liga_key, categoria_key)
+    if not json_cat:
         return []
 
     equipos_categorias = load_equipos_categorias()
     
-    # Leemos directamente del archivo para asegurar que los datos estén frescos
-    try:
-        with open("fixture.json", "r", encoding="utf-8") as f:
-            source_fixtures = json.load(f)
-    except Exception as e:
-        print(f"Error loading fixture.json: {e}")
-        source_fixtures = []
-
+    # Leemos de la base (índice por liga/fecha): siempre tiene la última versión,
+    # proceso_ortools_async la escribe antes que fixture.json
     filtered_fechas = []
-    for f in source_fixtures:
-        if f["liga"] == target_div:
-            valid_partidos = []
-            for p in f.get("partidos", []):
-                local = p["local"]
-                visitante = p["visitante"]
-                
-                if local.startswith("Libre_") or visitante.startswith("Libre_"):
-                    continue
-                
-                local_categorias = equipos_categorias.get(local, {})
-                visit_categorias = equipos_categorias.get(visitante, {})
-                
-                if local_categorias.get(json_cat) and visit_categorias.get(json_cat):
-                    valid_partidos.append(p)
+    for nro_fecha, partidos in groupby(fixture_store.partidos_liga(target_div), key=lambda p: p.nroFecha):
+        valid_partidos = []
+        for p in partidos:
+            local = p.local
+            visitante = p.visitante
+            
+            if local.startswith("Libre_") or visitante.startswith("Libre_"):
+                continue
+            
+            local_categorias = equipos_categorias.get(local, {})
+            visit_categorias = equipos_categorias.get(visitante, {})
             
-            if valid_partidos:
-                # Incluimos solo los partidos válidos (donde ambos tienen esta categoría)
-                filtered_fechas.append({
-                    "nroFecha": f["nroFecha"],
-                    "liga": f["liga"],
-                    "partidos": valid_partidos
-                })
+            if local_categorias.get(json_cat) and visit_categorias.get(json_cat):
+                valid_partidos.append({"local": local, "visitante": visitante, "cancha": p.cancha})
+        
+        if valid_partidos:
+            # Incluimos solo los partidos válidos (donde ambos tienen esta categoría)
+            filtered_fechas.append({
+                "nroFecha": nro_fecha,
+                "liga": target_div,
+                "partidos": valid_partidos
+            })
                 
     return filtered_fechas
 
@@ -309,10 +415,7 @@ async def obtener_equipos():
                 division_mayor = div_mayor_json.upper()
 
             # Asignación de días de juego
-            if b_name in ["JUVENILES", "FEM_MAYORES", "FEM_MENORES"]:
-                dia_de_juego = "SABADO"
-            else:
-                dia_de_juego = "DOMINGO"
+            dia_de_juego = fixture_dias.dia_de_juego(b_name)
 
             # En caso de no tener ID en el JSON, generamos uno compuesto para los splits
             base_id = eq_json.get("id", (i + 1) * 10)
@@ -334,6 +437,101 @@ async def obtener_equipos():
             
     return resultado
 
+@app.get("/fixture/versiones", response_model=List[VersionDTO])
+def obtener_versiones():
+    return [
+        VersionDTO(id=v.id, jobId=v.jobId, creado=v.creado.isoformat(), status=v.status)
+        for v in fixture_store.listar_versiones()
+    ]
+
+@app.get("/fixture/equipo/{nombre}/calendario", response_model=List[PartidoFechaDTO])
+def calendario_equipo(nombre: str, version: Optional[int] = None):
+    return [fixture_store.partido_a_dict(r) for r in fixture_store.calendario_equipo(nombre, version)]
+
+@app.get("/fixture/cancha/{cancha}", response_model=List[PartidoFechaDTO])
+def ocupacion_cancha(cancha: str, nroFecha: Optional[int] = None, version: Optional[int] = None):
+    return [fixture_store.partido_a_dict(r) for r in fixture_store.ocupacion_cancha(cancha, nroFecha, version)]
+
+@app.get("/fixture/diff")
+def diff_fixture(desde: int, hasta: int):
+    versiones = {v.id for v in fixture_store.listar_versiones()}
+    if desde not in versiones or hasta not in versiones:
+        raise HTTPException(status_code=404, detail="Versión no encontrada")
+    return fixture_store.diff_versiones(desde, hasta)
+
+def resolver_filtros_export(liga: Optional[str], categoria: Optional[str], club: Optional[str]):
+    """
+    Traduce los filtros de los exports a lo que entiende fixture_store.iter_partidos:
+    (ligas, equipos, json_cat). `club` incluye todos los equipos cuyo clubPadre es ese club.
+    """
+    ligas = None
+    json_cat = None
+    equipos = None
+
+    liga_key = liga.strip().upper() if liga else None
+    if categoria:
+        # Sin liga, la categoría abarca todas sus divisiones (A, B y C; femenino es una sola)
+        ligas = []
+        for key in ([liga_key] if liga_key else ["A", "B", "C"]):
+            json_cat, target_div = resolver_categoria(key, categoria.strip().upper())
+            if not json_cat:
+                raise HTTPException(status_code=400, detail=f"Categoría inválida: {categoria}")
+            if target_div not in ligas:
+                ligas.append(target_div)
+    elif liga_key:
+        ligas = [f"MAYORES-{liga_key}", f"JUVENILES-{liga_key}", f"INFANTILES-{liga_key}"]
+        if liga_key == "A":
+            ligas += ["FEMENINO MAYORES-A", "FEMENINO MENORES-A"]
+
+    if club:
+        club = club.strip()
+        equipos = {
+            eq["nombre"] for eq in equipos_db
+            if eq.get("nombre") == club or eq.get("clubPadre") == club
+        }
+        if not equipos:
+            raise HTTPException(status_code=404, detail=f"Club no encontrado: {club}")
+
+    return ligas, equipos, json_cat
+
+def filtrar_por_categoria(partidos, json_cat: Optional[str]):
+    # Igual que /fixture: solo partidos donde ambos equipos tienen la categoría
+    if not json_cat:
+        yield from partidos
+        return
+    equipos_categorias = load_equipos_categorias()
+    for p in partidos:
+        if (equipos_categorias.get(p.local, {}).get(json_cat)
+                and equipos_categorias.get(p.visitante, {}).get(json_cat)):
+            yield p
+
+@app.get("/fixture/export.csv")
+def exportar_csv(liga: Optional[str] = None, categoria: Optional[str] = None,
+                 club: Optional[str] = None, version: Optional[int] = None):
+    ligas, equipos, json_cat = resolver_filtros_export(liga, categoria, club)
+    partidos = filtrar_por_categoria(fixture_store.iter_partidos(version, ligas, equipos), json_cat)
+    return StreamingResponse(
+        fixture_export.generar_csv(partidos),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="fixture.csv"'},
+    )
+
+@app.get("/fixture/equipo/{nombre}.ics")
+def exportar_ics(nombre: str, liga: Optional[str] = None, categoria: Optional[str] = None,
+                 inicio: Optional[date] = None, version: Optional[int] = None):
+    # `inicio` es el sábado de la fecha 1; si no viene usamos el próximo sábado
+    if inicio is None:
+        hoy = date.today()
+        inicio = hoy + timedelta(days=(5 - hoy.weekday()) % 7)
+
+    ligas, equipos, json_cat = resolver_filtros_export(liga, categoria, nombre)
+    partidos = filtrar_por_categoria(fixture_store.iter_partidos(version, ligas, equipos), json_cat)
+    return StreamingResponse(
+        fixture_export.generar_ics(partidos, f"Fixture {nombre.strip()}", inicio),
+        media_type="text/calendar; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(nombre.strip())}.ics"},
+    )
+
 @app.get("/fixture/update-db")
 async def update_db() -> ResponseDTO:
     try:
@@ -0,0 +1,135 @@
+"""
+Benchmark de arranque de la API.
+
+Cada escenario corre en un proceso nuevo (como un worker de uvicorn recién
+levantado) dentro de una copia temporal del proyecto, así no se toca la base
+ni el snapshot del directorio de trabajo. Los escenarios "antes" corren el
+api.py / fixture_generator.py de la ref de git que se pase en --baseline
+(el commit anterior al import diferido de OR-Tools), con los mismos JSON.
+Sin --baseline se miden solo los escenarios "después".
+
+    python bench_startup.py [repeticiones] [--baseline REF]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ARCHIVOS_BASELINE = ["api.py", "fixture_generator.py"]
+ARCHIVOS = ["api.py", "fixture_generator.py", "fixture_store.py", "fixture_export.py",
+            "fixture_dias.py", "equipos.json", "fixture.json"]
+
+# nombre -> (versión del código, script). Cada script imprime el tiempo en
+# segundos en la última línea
+ESCENARIOS = {
+    "import OR-Tools (cp_model)": ("despues", """
+import time
+t = time.perf_counter()
+import ortools.sat.python.cp_model
+print(time.perf_counter() - t)
+"""),
+    "antes: import api": ("antes", """
+import time
+t = time.perf_counter()
+import api
+print(time.perf_counter() - t)
+"""),
+    "después: import api, JSON (sin snapshot)": ("despues", """
+import os, sys, time
+os.path.exists("startup.snapshot") and os.remove("startup.snapshot")
+t = time.perf_counter()
+import api
+assert "ortools" not in sys.modules
+print(time.perf_counter() - t)
+"""),
+    "después: import api, snapshot": ("despues", """
+import sys, time
+t = time.perf_counter()
+import api
+assert "ortools" not in sys.modules
+print(time.perf_counter() - t)
+"""),
+    "antes: init_db()": ("antes", """
+import time
+import api
+t = time.perf_counter()
+api.init_db()
+print(time.perf_counter() - t)
+"""),
+    "después: init_db() desde JSON": ("despues", """
+import os, time
+import api
+os.remove("startup.snapshot")
+t = time.perf_counter()
+api.init_db()
+print(time.perf_counter() - t)
+"""),
+    "después: init_db() desde snapshot": ("despues", """
+import time
+import api
+t = time.perf_counter()
+api.init_db()
+print(time.perf_counter() - t)
+"""),
+}
+
+
+def medir(directorio, script):
+    salida = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=directorio, capture_output=True, text=True, check=True,
+    )
+    return float(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de la API")
+    parser.add_argument("repeticiones", nargs="?", type=int, default=5)
+    parser.add_argument("--baseline", help="ref de git con el código de los escenarios 'antes'")
+    args = parser.parse_args()
+    origen = os.path.dirname(os.path.abspath(__file__))
+
+    escenarios = {
+        nombre: escenario for nombre, escenario in ESCENARIOS.items()
+        if args.baseline or escenario[0] != "antes"
+    }
+
+    with tempfile.TemporaryDirectory() as directorio:
+        versiones = ["antes", "despues"] if args.baseline else ["despues"]
+        directorios = {version: os.path.join(directorio, version) for version in versiones}
+        for destino in directorios.values():
+            os.mkdir(destino)
+            for nombre in ARCHIVOS:
+                shutil.copy(os.path.join(origen, nombre), destino)
+
+        for nombre in ARCHIVOS_BASELINE if args.baseline else []:
+            salida = subprocess.run(
+                ["git", "show", f"{args.baseline}:{nombre}"],
+                cwd=origen, capture_output=True,
+            )
+            if salida.returncode != 0:
+                sys.exit(f"No se pudo leer {nombre} de --baseline {args.baseline}: {salida.stderr.decode().strip()}")
+            with open(os.path.join(directorios["antes"], nombre), "wb") as f:
+                f.write(salida.stdout)
+
+        # Primer arranque: crea fixture.db y el snapshot, y calienta el cache de .pyc
+        for destino in directorios.values():
+            medir(destino, "import api\nprint(0)")
+
+        # Intercalamos los escenarios para que el ruido de la máquina afecte a todos por igual
+        tiempos = {nombre: [] for nombre in escenarios}
+        for _ in range(args.repeticiones):
+            for nombre, (version, script) in escenarios.items():
+                tiempos[nombre].append(medir(directorios[version], script))
+
+        print(f"{'Escenario':<45} {'mediana':>10} {'mín':>10}")
+        for nombre in escenarios:
+            tiempos[nombre].sort()
+            mediana = tiempos[nombre][len(tiempos[nombre]) // 2]
+            print(f"{nombre:<45} {mediana * 1000:>8.1f}ms {tiempos[nombre][0] * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+SABADO = "SABADO"
+DOMINGO = "DOMINGO"
+
+
+def dia_de_juego(division: str) -> str:
+    """
+    Día en que se juega una división del fixture (e.g. JUVENILES-A,
+    FEMENINO MAYORES-A) o un bloque de /fixture/equipos (e.g. FEM_MENORES).
+    Juveniles y femenino juegan el sábado, mayores e infantiles el domingo.
+    Lo usan el generador (canchas compartidas), la API y el export .ics.
+    """
+    if "JUVENILES" in division or division.startswith("FEM"):
+        return SABADO
+    return DOMINGO
@@ -0,0 +1,110 @@
+import csv
+import io
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator
+
+from fixture_dias import SABADO, dia_de_juego
+
+
+# ==========================================
+# 1. CSV
+# ==========================================
+
+CSV_COLUMNAS = ["liga", "nroFecha", "local", "visitante", "cancha"]
+
+
+def generar_csv(partidos: Iterable) -> Iterator[str]:
+    """
+    Genera el CSV de a una línea por partido. Reutiliza un único buffer
+    chico, así el consumo de memoria no depende del tamaño del fixture.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM para que Excel abra bien los acentos
+    writer.writerow(CSV_COLUMNAS)
+    yield "\ufeff" + _vaciar(buffer)
+
+    for p in partidos:
+        writer.writerow([p.liga, p.nroFecha, p.local, p.visitante, p.cancha])
+        yield _vaciar(buffer)
+
+
+def _vaciar(buffer: io.StringIO) -> str:
+    linea = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return linea
+
+
+# ==========================================
+# 2. iCalendar (RFC 5545)
+# ==========================================
+
+def dia_del_partido(liga: str, nro_fecha: int, inicio: date) -> date:
+    """
+    El fixture no tiene fechas reales, solo número de fecha. Tomamos `inicio`
+    como el sábado de la fecha 1 y avanzamos una semana por fecha; el día de
+    la semana sale de fixture_dias.dia_de_juego.
+    """
+    dia = inicio + timedelta(weeks=nro_fecha - 1)
+    if dia_de_juego(liga) == SABADO:
+        return dia
+    return dia + timedelta(days=1)
+
+
+def generar_ics(partidos: Iterable, nombre_calendario: str, inicio: date) -> Iterator[str]:
+    """Genera un VCALENDAR con un evento de día completo por partido."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    yield _linea("BEGIN:VCALENDAR")
+    yield _linea("VERSION:2.0")
+    yield _linea("PRODID:-//Liga de Tandil//Fixture//ES")
+    yield _linea("CALSCALE:GREGORIAN")
+    yield _linea(f"X-WR-CALNAME:{_escapar(nombre_calendario)}")
+
+    for p in partidos:
+        dia = dia_del_partido(p.liga, p.nroFecha, inicio)
+        uid = f"{p.versionId}-{p.liga}-{p.nroFecha}-{p.local}-{p.visitante}".replace(" ", "_")
+        yield (
+            _linea("BEGIN:VEVENT")
+            + _linea(f"UID:{_escapar(uid)}@ligatandil")
+            + _linea(f"DTSTAMP:{stamp}")
+            + _linea(f"DTSTART;VALUE=DATE:{dia.strftime('%Y%m%d')}")
+            + _linea(f"DTEND;VALUE=DATE:{(dia + timedelta(days=1)).strftime('%Y%m%d')}")
+            + _linea(f"SUMMARY:{_escapar(f'{p.local} vs {p.visitante}')}")
+            + _linea(f"LOCATION:{_escapar(p.cancha)}")
+            + _linea(f"DESCRIPTION:{_escapar(f'{p.liga} - Fecha {p.nroFecha}')}")
+            + _linea("END:VEVENT")
+        )
+
+    yield _linea("END:VCALENDAR")
+
+
+def _escapar(texto: str) -> str:
+    return (
+        texto.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _linea(contenido: str) -> str:
+    """Termina la línea en CRLF y la pliega a 75 octetos como pide el RFC."""
+    crudo = contenido.encode("utf-8")
+    if len(crudo) <= 75:
+        return contenido + "\r\n"
+
+    partes = []
+    actual = b""
+    limite = 75
+    for char in contenido:
+        c = char.encode("utf-8")
+        if len(actual) + len(c) > limite:
+            partes.append(actual.decode("utf-8"))
+            actual = b""
+            limite = 74  # Las continuaciones empiezan con un espacio
+        actual += c
+    partes.append(actual.decode("utf-8"))
+    return "\r\n ".join(partes) + "\r\n"
@@ -1,5 +1,25 @@
 import json
+import os
 from ortools.sat.python import cp_model
+from fixture_dias import DOMINGO, SABADO, dia_de_juego
+
+# Tiempo de la fase que minimiza las penalidades SOFT, aparte de los 60s del objetivo completo
+TIEMPO_FASE_PENALIDADES = 30.0
+
+
+def solver_workers():
+    """
+    Threads de CP-SAT. El solver corre dentro del worker de la API (BackgroundTask),
+    así que por defecto usa los CPUs disponibles para el proceso y no más;
+    FIXTURE_SOLVER_WORKERS lo pisa (e.g. en un contenedor con cuota de CPU).
+    """
+    valor = os.environ.get("FIXTURE_SOLVER_WORKERS")
+    if valor:
+        return max(1, int(valor))
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
 
 class FixtureGenerator:
     def __init__(self, json_path):
@@ -11,29 +31,39 @@ class FixtureGenerator:
             self.equipos.append(eq_data)
             
         self.reglas = data.get("reglas", [])
+        self.capacidades = data.get("capacidades", [])
+        for cap in self.capacidades:
+            self._validar_capacidad(cap)
             
         self.divisiones = {}
+        self.estadio_div = {}  # (div, nombre) -> estadioLocal de ese equipo en esa división
         for eq in self.equipos:
             cats = eq.get("categorias", {})
             nombre = eq.get("nombre", "")
+            divs_eq = []
             
             if cats.get("primera") or cats.get("reserva"):
                 liga = eq.get("divisionMayor", "A").upper()
-                self.divisiones.setdefault(f"MAYORES-{liga}", []).append(nombre)
+                divs_eq.append(f"MAYORES-{liga}")
                 
             if cats.get("quinta") or cats.get("sexta") or cats.get("septima") or cats.get("octava"):
                 liga = eq.get("divisionMayor", "A").upper()
-                self.divisiones.setdefault(f"JUVENILES-{liga}", []).append(nombre)
+                divs_eq.append(f"JUVENILES-{liga}")
                 
             if cats.get("novena") or cats.get("decima") or cats.get("undecima"):
                 liga = eq.get("divisionInfantiles", eq.get("divisionMayor", "A")).upper()
-                self.divisiones.setdefault(f"INFANTILES-{liga}", []).append(nombre)
+                divs_eq.append(f"INFANTILES-{liga}")
                 
             if cats.get("femenino_primera") or cats.get("femenino_sub16"):
-                self.divisiones.setdefault("FEMENINO MAYORES-A", []).append(nombre)
+                divs_eq.append("FEMENINO MAYORES-A")
                 
             if cats.get("femenino_sub14") or cats.get("femenino_sub12"):
-                self.divisiones.setdefault("FEMENINO MENORES-A", []).append(nombre)
+                divs_eq.append("FEMENINO MENORES-A")
+
+            for div in divs_eq:
+                self.divisiones.setdefault(div, []).append(nombre)
+                if "estadioLocal" in eq:
+                    self.estadio_div[(div, nombre)] = eq["estadioLocal"]
         
         self.fechas_por_div = {}
         for div, teams in self.divisiones.items():
@@ -48,13 +78,35 @@ class FixtureGenerator:
             
         self.fechas_max = max(self.fechas_por_div.values()) if self.fechas_por_div else 0
 
-        self.clubes_padre = set()
+        # Índices precalculados: equipo -> club padre, club padre -> localidad,
+        # localidad -> clubes, estadio -> equipos (por división) que hacen de local ahí
+        # y club -> equipos (por división)
+        self.padre_de = {}
+        self.localidad_club = {}
         for eq in self.equipos:
             if eq.get("is_dummy"):
                 padre = eq["nombre"]
             else:
                 padre = eq.get("clubPadre", eq["nombre"])
-            self.clubes_padre.add(padre)
+            self.padre_de.setdefault(eq["nombre"], padre)
+            if eq.get("localidad"):
+                self.localidad_club.setdefault(padre, eq["localidad"])
+
+        self.clubes_padre = set(self.padre_de.values())
+
+        self.clubes_por_localidad = {}
+        for padre, localidad in self.localidad_club.items():
+            self.clubes_por_localidad.setdefault(localidad, []).append(padre)
+
+        self.equipos_por_estadio = {}
+        for (div, nombre), estadio in self.estadio_div.items():
+            self.equipos_por_estadio.setdefault(estadio, []).append((div, nombre))
+
+        self.equipos_por_club = {}  # club padre -> [(div, nombre)] de todas sus divisiones
+        for div, equipos_div in self.divisiones.items():
+            for nombre in equipos_div:
+                if not nombre.startswith("Libre_"):
+                    self.equipos_por_club.setdefault(self._get_entidad(nombre), []).append((div, nombre))
 
     def _has_primera_reserva(self, e):
         cats = e.get("categorias", {})
@@ -69,13 +121,10 @@ class FixtureGenerator:
         return any(cats.get(k, False) for k in ["femenino_primera", "femenino_sub16", "femenino_sub14", "femenino_sub12"])
 
     def _get_entidad(self, eq_name):
-        for e in self.equipos:
-            if e["nombre"] == eq_name:
-                if e.get("is_dummy"): return eq_name
-                return e.get("clubPadre", e["nombre"])
-        return eq_name
+        return self.padre_de.get(eq_name, eq_name)
 
-    def solve(self):
+    def build_model(self):
+        """Arma el modelo CP-SAT completo (variables, restricciones y objetivo) sin resolverlo."""
         model = cp_model.CpModel()
         
         self.juega = {}
@@ -96,23 +145,39 @@ class FixtureGenerator:
 
         self._add_structural_constraints(model)
         self._add_logistical_constraints(model)
+        return model
+
+    def solve(self):
+        model = self.build_model()
         
         solver = cp_model.CpSolver()
         solver.parameters.max_time_in_seconds = 60.0
         solver.parameters.log_search_progress = True
+        solver.parameters.num_workers = solver_workers()
         print("Starting solver...")
+        fase1 = None
+        if self.penalties:
+            fase1 = self._minimizar_penalidades(model, solver)
         status = solver.Solve(model)
         
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
             print("Solución encontrada!")
-            fechas_dto = self._build_fechas_dto(solver)
+            fechas_dto = self._build_fechas_dto(self._valores_juega(solver))
             return fechas_dto, solver.StatusName(status)
+        elif fase1 is not None:
+            # La fase 2 no encontró solución en su tiempo: la de la fase 1 ya cumple todas las restricciones
+            valores, status_fase1 = fase1
+            print("Status:", solver.StatusName(status), "- usamos la solución de la fase 1")
+            return self._build_fechas_dto(valores), status_fase1
         else:
             print("Status:", solver.StatusName(status))
             print("No se encontró solución factible en el tiempo estipulado.")
             return None, solver.StatusName(status)
 
-    def _build_fechas_dto(self, solver):
+    def _valores_juega(self, solver):
+        return {key: solver.BooleanValue(var) for key, var in self.juega.items()}
+
+    def _build_fechas_dto(self, juega_valores):
         fechas_dict = {}
         for d in range(1, self.fechas_max + 1):
             
@@ -133,15 +198,11 @@ class FixtureGenerator:
                 for i in equipos_div:
                     for j in equipos_div:
                         if i != j:
-                            if solver.BooleanValue(self.juega[(d, div, i, j)]):
+                            if juega_valores[(d, div, i, j)]:
                                 # Avoid adding Free (Libre) matches to the final fixture unless desired
                                 if not i.startswith("Libre_") and not j.startswith("Libre_"):
-                                    cancha = self._get_entidad(i) # Basic fallback
-                                    for e in self.equipos:
-                                        if e["nombre"] == i and "estadioLocal" in e:
-                                            cancha = e["estadioLocal"]
-                                            break
-                                            
+                                    cancha = self.estadio_div.get((div, i), self._get_entidad(i))
+
                                     fechas_dict[key]["partidos"].append({
                                         "local": i,
                                         "visitante": j,
@@ -338,19 +399,144 @@ class FixtureGenerator:
 
         self.penalties = []
 
-        # 2. Ayacucho Policía - SOFT CONSTRAINT
-        ayacucho = ["BOTAFOGO F.C.", "ATLETICO AYACUCHO", "SARMIENTO (AYACUCHO)", "DEFENSORES DE AYACUCHO", "ATENEO ESTRADA"]
-        ayacucho_valid = [x for x in ayacucho if x in self.clubes_padre]
-        for d in range(1, self.fechas_max + 1):
-            sum_locals = sum(self.es_local[(d, e)] for e in ayacucho_valid)
-            excess = model.NewIntVar(0, len(ayacucho_valid), f"exceso_ayac_{d}")
-            model.Add(excess >= sum_locals - 2)
-            self.penalties.append(excess * 50) # Heavy penalty for exceeding police limit
+        # 2. Capacidades por localidad / estadio (policía, canchas compartidas)
+        self._add_capacity_constraints(model)
 
         self._apply_user_constraints(model)
         
         # Maximize the synchronization points minus penalties
-        model.Maximize(sum(self.sync_rewards) + sum(getattr(self, 'user_sync_rewards', [])) - sum(self.penalties))
+        self.objetivo = sum(self.sync_rewards) + sum(getattr(self, 'user_sync_rewards', [])) - sum(self.penalties)
+        model.Maximize(self.objetivo)
+
+    def _minimizar_penalidades(self, model, solver):
+        """
+        Fase 1, con su propio tiempo (TIEMPO_FASE_PENALIDADES): minimiza solo las
+        penalidades de las capacidades SOFT. Mezcladas con las ~1700 recompensas de
+        reglas de usuario (misma escala) el solver casi no las baja. Después el
+        objetivo completo se optimiza con sus 60s sin empeorarlas, arrancando de
+        esta solución (hint sobre todas las variables del modelo).
+        Devuelve (valores de juega, status) de la fase 1, o None si no encontró nada.
+        """
+        tiempo = solver.parameters.max_time_in_seconds
+        solver.parameters.max_time_in_seconds = TIEMPO_FASE_PENALIDADES
+        model.Minimize(sum(self.penalties))
+        status = solver.Solve(model)
+        solver.parameters.max_time_in_seconds = tiempo
+        model.Maximize(self.objetivo)
+        print("Penalidades (fase 1):", solver.StatusName(status))
+
+        if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+            return None
+
+        model.Add(sum(self.penalties) <= round(solver.ObjectiveValue()))
+        for idx in range(len(model.Proto().variables)):
+            var = model.GetIntVarFromProtoIndex(idx)
+            model.AddHint(var, solver.Value(var))
+        return self._valores_juega(solver), solver.StatusName(status)
+
+    def _add_capacity_constraints(self, model):
+        """
+        Arma las restricciones de "capacidades" de equipos.json. Cada una limita
+        cuántos clubes pueden ser locales a la vez:
+          - {"localidad": ...}: clubes de esa localidad locales (en cualquier división)
+            en la misma fecha (e.g. policía).
+          - {"estadioLocal": ...}: clubes distintos usando ese estadio el mismo día
+            (sábado/domingo), así mayores de un club e inferiores de otro no chocan en la cancha.
+            Con "dia" (SABADO / DOMINGO) el tope aplica solo a ese día.
+        tipo HARD es restricción dura; SOFT penaliza cada local de más con `peso`
+        (peso * 1000000, como las reglas de usuario) y se minimiza antes que el
+        resto del objetivo (ver _minimizar_penalidades).
+        """
+        for idx, cap in enumerate(self.capacidades):
+            maximo = cap.get("maxLocalesPorFecha", 1)
+            tipo = cap.get("tipo", "SOFT")
+            peso = cap.get("peso", 500)
+
+            if "localidad" in cap:
+                clubes = self.clubes_por_localidad.get(cap["localidad"], [])
+                if not clubes:
+                    print(f"Warning: capacidad sin clubes para localidad {cap['localidad']}")
+                    continue
+                if len(clubes) <= maximo:
+                    continue
+                for d in range(1, self.fechas_max + 1):
+                    # Un club cuenta si es local en cualquiera de sus divisiones esa fecha
+                    locales = []
+                    for club in clubes:
+                        vars_local = [
+                            self.es_local_div[(d, div, nombre)]
+                            for div, nombre in self.equipos_por_club.get(club, [])
+                            if (d, div, nombre) in self.es_local_div
+                        ]
+                        if vars_local:
+                            locales.append(self._club_local(model, vars_local, f"cap{idx}_d{d}_{club}"))
+                    if len(locales) > maximo:
+                        self._limit_locales(model, locales, maximo, tipo, peso, f"cap{idx}_d{d}")
+
+            elif "estadioLocal" in cap:
+                equipos_estadio = self.equipos_por_estadio.get(cap["estadioLocal"], [])
+                if not equipos_estadio:
+                    print(f"Warning: capacidad sin equipos para estadio {cap['estadioLocal']}")
+                    continue
+                for d in range(1, self.fechas_max + 1):
+                    # dia -> club padre -> variables de localía de sus equipos en el estadio
+                    por_dia = {}
+                    for div, nombre in equipos_estadio:
+                        if (d, div, nombre) not in self.es_local_div:
+                            continue
+                        clubes = por_dia.setdefault(dia_de_juego(div), {})
+                        clubes.setdefault(self._get_entidad(nombre), []).append(self.es_local_div[(d, div, nombre)])
+
+                    for dia, clubes in por_dia.items():
+                        if cap.get("dia", dia) != dia or len(clubes) <= maximo:
+                            continue
+                        locales = [
+                            self._club_local(model, vars_local, f"cap{idx}_d{d}_{dia}_{padre}")
+                            for padre, vars_local in clubes.items()
+                        ]
+                        self._limit_locales(model, locales, maximo, tipo, peso, f"cap{idx}_d{d}_{dia}")
+
+    def _validar_capacidad(self, cap):
+        """
+        Un error de tipeo en equipos.json (e.g. "dia": "domingo" o "tipo": "hard")
+        haría que el tope no aplique o pase a SOFT sin aviso: lo rechazamos al cargar.
+        """
+        if ("localidad" in cap) == ("estadioLocal" in cap):
+            raise ValueError(f"Capacidad inválida {cap}: tiene que tener 'localidad' o 'estadioLocal' (uno solo)")
+        if cap.get("tipo", "SOFT") not in ("HARD", "SOFT"):
+            raise ValueError(f"Capacidad inválida {cap}: 'tipo' tiene que ser HARD o SOFT")
+        if "dia" in cap:
+            if "estadioLocal" not in cap:
+                raise ValueError(f"Capacidad inválida {cap}: 'dia' solo aplica a estadioLocal")
+            if cap["dia"] not in (SABADO, DOMINGO):
+                raise ValueError(f"Capacidad inválida {cap}: 'dia' tiene que ser {SABADO} o {DOMINGO}")
+        maximo = cap.get("maxLocalesPorFecha", 1)
+        if isinstance(maximo, bool) or not isinstance(maximo, int) or maximo < 0:
+            raise ValueError(f"Capacidad inválida {cap}: 'maxLocalesPorFecha' tiene que ser un entero >= 0")
+        peso = cap.get("peso", 500)
+        if isinstance(peso, bool) or not isinstance(peso, int) or peso <= 0:
+            raise ValueError(f"Capacidad inválida {cap}: 'peso' tiene que ser un entero > 0")
+
+    def _club_local(self, model, vars_local, nombre):
+        """
+        Indicador "el club es local" a partir de la localía por división
+        (es_local_div, atada a los partidos reales). Alcanza con var -> indicador:
+        el tope sobre los indicadores ya acota a los partidos de local.
+        """
+        if len(vars_local) == 1:
+            return vars_local[0]
+        local = model.NewBoolVar(f"club_local_{nombre}")
+        for var in vars_local:
+            model.AddImplication(var, local)
+        return local
+
+    def _limit_locales(self, model, locales, maximo, tipo, peso, nombre):
+        if tipo == "HARD":
+            model.Add(sum(locales) <= maximo)
+        else:
+            excess = model.NewIntVar(0, len(locales), f"exceso_{nombre}")
+            model.Add(excess >= sum(locales) - maximo)
+            self.penalties.append(excess * (peso * 1000000))
 
     def _exists(self, nombre):
         for e in self.equipos:
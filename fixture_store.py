@@ -0,0 +1,267 @@
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import Index, event, or_, union_all
+from sqlmodel import Field, Session, SQLModel, create_engine, select
+
+
+# ==========================================
+# 1. Tablas (SQLModel)
+# ==========================================
+
+class FixtureVersion(SQLModel, table=True):
+    """Una corrida del generador. Cada job que termina bien crea una versión nueva."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    jobId: str = Field(index=True)
+    creado: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    status: str = ""
+
+
+class PartidoRow(SQLModel, table=True):
+    """Un partido de una versión. Se guarda plano (una fila por partido) para poder indexarlo."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    versionId: int = Field(foreign_key="fixtureversion.id")
+    liga: str
+    nroFecha: int
+    local: str
+    visitante: str
+    cancha: str
+
+    # Todas las consultas van acotadas a una versión, por eso versionId encabeza cada índice
+    __table_args__ = (
+        Index("ix_partido_version_liga_fecha", "versionId", "liga", "nroFecha"),
+        Index("ix_partido_version_local", "versionId", "local"),
+        Index("ix_partido_version_visitante", "versionId", "visitante"),
+        Index("ix_partido_version_cancha_fecha", "versionId", "cancha", "nroFecha"),
+    )
+
+
+# ==========================================
+# 2. Engine
+# ==========================================
+
+DB_URL = "sqlite:///fixture.db"
+
+
+def crear_engine(url: str):
+    """
+    Engine SQLite con journal WAL: los lectores no bloquean al escritor, así un
+    export en streaming (una transacción de lectura abierta mientras el cliente
+    descarga) no deja a guardar_fixture esperando hasta "database is locked".
+    """
+    # check_same_thread=False porque los background tasks de FastAPI corren en otro thread
+    nuevo = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(nuevo, "connect")
+    def _activar_wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    return nuevo
+
+
+engine = crear_engine(DB_URL)
+
+
+def init_store():
+    # create_all chequea y crea cada tabla por separado: con varios workers
+    # arrancando sobre una base nueva, dos pueden intentar crear la misma.
+    # BEGIN IMMEDIATE toma el lock de escritura antes del chequeo.
+    with engine.connect() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        SQLModel.metadata.create_all(conn)
+        conn.commit()
+
+
+# ==========================================
+# 3. Escritura
+# ==========================================
+
+def guardar_fixture(job_id: str, fechas: list, status: str = "") -> int:
+    """
+    Persiste un fixture completo (lista de fechas como la que devuelve
+    FixtureGenerator.solve()) como una versión nueva. Todo en una sola
+    transacción: si algo falla no queda una versión a medias.
+    """
+    with Session(engine) as session:
+        version_id = _insertar_version(session, job_id, fechas, status)
+        session.commit()
+        return version_id
+
+
+def sembrar_si_vacio(job_id: str, fechas: list, status: str = "") -> Optional[int]:
+    """
+    Igual que guardar_fixture pero solo si la base no tiene ninguna versión.
+    El chequeo y el insert van en la misma transacción con BEGIN IMMEDIATE
+    (toma el lock de escritura antes de leer), así varios workers arrancando
+    a la vez no siembran cada uno su propia versión. Devuelve None si ya había datos.
+    """
+    with Session(engine) as session:
+        session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        if session.exec(select(FixtureVersion.id).limit(1)).first() is not None:
+            session.rollback()
+            return None
+        version_id = _insertar_version(session, job_id, fechas, status)
+        session.commit()
+        return version_id
+
+
+def _insertar_version(session, job_id: str, fechas: list, status: str) -> int:
+    version = FixtureVersion(jobId=job_id, status=status)
+    session.add(version)
+    session.flush()  # Necesitamos el id antes de insertar los partidos
+
+    for f in fechas:
+        for p in f.get("partidos", []):
+            session.add(PartidoRow(
+                versionId=version.id,
+                liga=f["liga"],
+                nroFecha=f["nroFecha"],
+                local=p["local"],
+                visitante=p["visitante"],
+                cancha=p["cancha"],
+            ))
+    return version.id
+
+
+# ==========================================
+# 4. Consultas
+# ==========================================
+
+def listar_versiones() -> List[FixtureVersion]:
+    with Session(engine) as session:
+        return session.exec(select(FixtureVersion).order_by(FixtureVersion.id.desc())).all()
+
+
+def _resolver_version(session, version_id: Optional[int]) -> Optional[int]:
+    if version_id is not None:
+        return version_id
+    return session.exec(select(FixtureVersion.id).order_by(FixtureVersion.id.desc()).limit(1)).first()
+
+
+def calendario_equipo(nombre: str, version_id: Optional[int] = None) -> List[PartidoRow]:
+    """Todos los partidos de un equipo (de local o de visitante), ordenados por fecha."""
+    with Session(engine) as session:
+        version_id = _resolver_version(session, version_id)
+        if version_id is None:
+            return []
+        # UNION ALL en vez de OR: con el OR SQLite se queda solo con versionId y
+        # recorre la versión entera; así cada rama usa su índice (local / visitante)
+        ids = union_all(
+            select(PartidoRow.id).where(PartidoRow.versionId == version_id, PartidoRow.local == nombre),
+            select(PartidoRow.id).where(PartidoRow.versionId == version_id, PartidoRow.visitante == nombre),
+        )
+        query = (
+            select(PartidoRow)
+            .where(PartidoRow.id.in_(ids))
+            .order_by(PartidoRow.nroFecha, PartidoRow.liga)
+        )
+        return session.exec(query).all()
+
+
+def ocupacion_cancha(cancha: str, nro_fecha: Optional[int] = None,
+                     version_id: Optional[int] = None) -> List[PartidoRow]:
+    """Partidos que se juegan en una cancha, opcionalmente en una sola fecha."""
+    with Session(engine) as session:
+        version_id = _resolver_version(session, version_id)
+        if version_id is None:
+            return []
+        query = (
+            select(PartidoRow)
+            .where(PartidoRow.versionId == version_id)
+            .where(PartidoRow.cancha == cancha)
+        )
+        if nro_fecha is not None:
+            query = query.where(PartidoRow.nroFecha == nro_fecha)
+        return session.exec(query.order_by(PartidoRow.nroFecha, PartidoRow.liga)).all()
+
+
+def partidos_liga(liga: str, version_id: Optional[int] = None) -> List[PartidoRow]:
+    """
+    Partidos de una liga (e.g. MAYORES-A), ordenados por fecha y, dentro de
+    cada fecha, en el orden en que vinieron en el fixture (id de inserción).
+    """
+    with Session(engine) as session:
+        version_id = _resolver_version(session, version_id)
+        if version_id is None:
+            return []
+        query = (
+            select(PartidoRow)
+            .where(PartidoRow.versionId == version_id)
+            .where(PartidoRow.liga == liga)
+            .order_by(PartidoRow.nroFecha, PartidoRow.id)
+        )
+        return session.exec(query).all()
+
+
+def iter_partidos(version_id: Optional[int] = None, ligas: Optional[Iterable[str]] = None,
+                  equipos: Optional[Iterable[str]] = None, lote: int = 500) -> Iterator[PartidoRow]:
+    """
+    Recorre los partidos de una versión de a `lote` filas, ordenados por
+    (liga, nroFecha) para que salgan directo del índice sin ordenar en memoria.
+    Pensado para los exports en streaming: nunca se carga la versión completa.
+    """
+    with Session(engine) as session:
+        version_id = _resolver_version(session, version_id)
+        if version_id is None:
+            return
+        query = select(PartidoRow).where(PartidoRow.versionId == version_id)
+        if ligas is not None:
+            query = query.where(PartidoRow.liga.in_(list(ligas)))
+        if equipos is not None:
+            equipos = list(equipos)
+            query = query.where(or_(PartidoRow.local.in_(equipos), PartidoRow.visitante.in_(equipos)))
+        query = query.order_by(PartidoRow.liga, PartidoRow.nroFecha).execution_options(yield_per=lote)
+        for row in session.exec(query):
+            yield row
+
+
+def diff_versiones(desde: int, hasta: int) -> dict:
+    """
+    Compara dos versiones partido por partido. Un partido se identifica por
+    (liga, local, visitante); si cambia de fecha o de cancha cuenta como
+    modificado, si aparece en una sola versión como agregado/eliminado.
+    """
+    def _por_clave(session, version_id):
+        rows = session.exec(select(PartidoRow).where(PartidoRow.versionId == version_id)).all()
+        return {(r.liga, r.local, r.visitante): r for r in rows}
+
+    with Session(engine) as session:
+        antes = _por_clave(session, desde)
+        despues = _por_clave(session, hasta)
+
+    agregados = [partido_a_dict(despues[k]) for k in despues.keys() - antes.keys()]
+    eliminados = [partido_a_dict(antes[k]) for k in antes.keys() - despues.keys()]
+    modificados = []
+    for k in antes.keys() & despues.keys():
+        a, b = antes[k], despues[k]
+        if a.nroFecha != b.nroFecha or a.cancha != b.cancha:
+            modificados.append({
+                "liga": a.liga,
+                "local": a.local,
+                "visitante": a.visitante,
+                "nroFechaAntes": a.nroFecha,
+                "nroFechaDespues": b.nroFecha,
+                "canchaAntes": a.cancha,
+                "canchaDespues": b.cancha,
+            })
+
+    orden = lambda p: (p["liga"], p.get("nroFecha", p.get("nroFechaAntes")), p["local"])
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "agregados": sorted(agregados, key=orden),
+        "eliminados": sorted(eliminados, key=orden),
+        "modificados": sorted(modificados, key=orden),
+    }
+
+
+def partido_a_dict(r: PartidoRow) -> dict:
+    return {
+        "liga": r.liga,
+        "nroFecha": r.nroFecha,
+        "local": r.local,
+        "visitante": r.visitante,
+        "cancha": r.cancha,
+    }
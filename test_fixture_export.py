@@ -0,0 +1,171 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from types import SimpleNamespace
+
+import fixture_dias
+import fixture_export
+import fixture_store
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def _partido(**kwargs):
+    datos = {"versionId": 1, "liga": "MAYORES-A", "nroFecha": 1, "local": "Santamarina",
+             "visitante": "Independiente", "cancha": "Predio Centenario"}
+    datos.update(kwargs)
+    return SimpleNamespace(**datos)
+
+
+@contextlib.contextmanager
+def _cliente():
+    # La API lee equipos.json / fixture.json del directorio actual: la corremos
+    # sobre una copia en un directorio temporal, con su propia base
+    from fastapi.testclient import TestClient
+
+    cwd_anterior = os.getcwd()
+    engine_anterior = fixture_store.engine
+    with tempfile.TemporaryDirectory() as directorio:
+        for nombre in ("equipos.json", "fixture.json"):
+            shutil.copy(os.path.join(RAIZ, nombre), directorio)
+        os.chdir(directorio)
+        fixture_store.engine = fixture_store.crear_engine(f"sqlite:///{os.path.join(directorio, 'fixture.db')}")
+        try:
+            import api
+            api.init_db()
+            yield TestClient(api.app)
+        finally:
+            fixture_store.engine.dispose()
+            fixture_store.engine = engine_anterior
+            os.chdir(cwd_anterior)
+
+
+# ==========================================
+# CSV
+# ==========================================
+
+def test_csv_encabezado_y_filas():
+    salida = "".join(fixture_export.generar_csv([_partido(), _partido(local='Club "X", de Tandil')]))
+    assert salida.startswith("\ufeff")
+    filas = list(csv.reader(io.StringIO(salida.lstrip("\ufeff"))))
+    assert filas[0] == fixture_export.CSV_COLUMNAS
+    assert filas[2][2] == 'Club "X", de Tandil'
+
+
+def test_csv_igual_a_fixture_por_categoria():
+    with _cliente() as cliente:
+        for liga, categoria in [("A", "QUINTA"), ("B", "PRIMERA"), ("A", "FEM_SUB14")]:
+            esperados = sorted(
+                (f["liga"], f["nroFecha"], p["local"], p["visitante"])
+                for f in cliente.get("/fixture", params={"liga": liga, "categoria": categoria}).json()
+                for p in f["partidos"]
+            )
+            texto = cliente.get("/fixture/export.csv", params={"liga": liga, "categoria": categoria}).text
+            filas = list(csv.DictReader(io.StringIO(texto.lstrip("\ufeff"))))
+            obtenidos = sorted((r["liga"], int(r["nroFecha"]), r["local"], r["visitante"]) for r in filas)
+            assert esperados and obtenidos == esperados, (liga, categoria)
+
+
+def test_fixture_desde_la_base_igual_a_fixture_json():
+    # /fixture lee de la base; tiene que devolver lo mismo que filtrar fixture.json
+    with open(os.path.join(RAIZ, "fixture.json"), encoding="utf-8") as f:
+        fechas = json.load(f)
+    with _cliente() as cliente:
+        import api
+        categorias = api.load_equipos_categorias()
+        for liga, categoria in [("A", "PRIMERA"), ("B", "QUINTA"), ("C", "NOVENA"), ("A", "FEM_SUB16")]:
+            json_cat, target_div = api.resolver_categoria(liga, categoria)
+            esperado = []
+            for f in fechas:
+                if f["liga"] != target_div:
+                    continue
+                partidos = [
+                    p for p in f["partidos"]
+                    if categorias.get(p["local"], {}).get(json_cat) and categorias.get(p["visitante"], {}).get(json_cat)
+                ]
+                if partidos:
+                    esperado.append({"nroFecha": f["nroFecha"], "liga": f["liga"], "partidos": partidos})
+            obtenido = cliente.get("/fixture", params={"liga": liga, "categoria": categoria}).json()
+            assert esperado and obtenido == esperado, (liga, categoria)
+
+
+def test_csv_categoria_sin_liga_abarca_todas_las_divisiones():
+    with _cliente() as cliente:
+        texto = cliente.get("/fixture/export.csv", params={"categoria": "primera", "club": "Grupo Universitario"}).text
+        filas = list(csv.DictReader(io.StringIO(texto.lstrip("\ufeff"))))
+        assert filas
+        assert {r["liga"] for r in filas} == {"MAYORES-B"}
+
+        assert cliente.get("/fixture/export.csv", params={"categoria": "nope"}).status_code == 400
+        assert cliente.get("/fixture/export.csv", params={"club": "nope"}).status_code == 404
+
+
+# ==========================================
+# iCalendar
+# ==========================================
+
+def test_ics_pliega_lineas_largas():
+    contenido = "DESCRIPTION:" + "Ñandú " * 30
+    linea = fixture_export._linea(contenido)
+
+    partes = linea[:-2].split("\r\n")
+    assert len(partes) > 1
+    assert all(len(p.encode("utf-8")) <= 75 for p in partes)
+    assert all(p.startswith(" ") for p in partes[1:])
+    # Desplegar (sacar CRLF + espacio) devuelve la línea original
+    assert linea[:-2].replace("\r\n ", "") == contenido
+
+
+def test_ics_linea_corta_sin_plegar():
+    assert fixture_export._linea("VERSION:2.0") == "VERSION:2.0\r\n"
+
+
+def test_ics_escapa_texto():
+    assert fixture_export._escapar("a,b;c\\d\ne") == "a\\,b\\;c\\\\d\\ne"
+
+
+def test_ics_eventos():
+    inicio = date(2026, 3, 7)  # sábado
+    salida = "".join(fixture_export.generar_ics(
+        [_partido(), _partido(liga="JUVENILES-A", nroFecha=2)], "Fixture Santamarina", inicio))
+
+    assert salida.startswith("BEGIN:VCALENDAR\r\n")
+    assert salida.endswith("END:VCALENDAR\r\n")
+    assert salida.count("BEGIN:VEVENT") == 2
+    # Mayores el domingo de la fecha 1, juveniles el sábado de la fecha 2
+    assert "DTSTART;VALUE=DATE:20260308\r\n" in salida
+    assert "DTSTART;VALUE=DATE:20260314\r\n" in salida
+    assert "SUMMARY:Santamarina vs Independiente\r\n" in salida
+
+
+def test_dia_de_juego_divisiones_y_bloques():
+    # Mismo día para la división del fixture y para el bloque de /fixture/equipos
+    for division, bloque, dia in [
+        ("MAYORES-B", "MAYORES", fixture_dias.DOMINGO),
+        ("INFANTILES-C", "INFANTILES", fixture_dias.DOMINGO),
+        ("JUVENILES-A", "JUVENILES", fixture_dias.SABADO),
+        ("FEMENINO MENORES-A", "FEM_MENORES", fixture_dias.SABADO),
+    ]:
+        assert fixture_dias.dia_de_juego(division) == fixture_dias.dia_de_juego(bloque) == dia
+
+
+def test_ics_endpoint_por_club():
+    with _cliente() as cliente:
+        respuesta = cliente.get("/fixture/equipo/Loma Negra.ics", params={"inicio": "2026-03-07"})
+        assert respuesta.status_code == 200
+        assert respuesta.headers["content-type"].startswith("text/calendar")
+        # Incluye los equipos con clubPadre Loma Negra (inferiores)
+        assert "Loma Negra Inferiores" in respuesta.text
+        assert cliente.get("/fixture/equipo/Nope.ics").status_code == 404
+
+
+if __name__ == "__main__":
+    for nombre, test in list(globals().items()):
+        if nombre.startswith("test_"):
+            test()
+            print(f"OK {nombre}")
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+
+from ortools.sat.python import cp_model
+
+from fixture_generator import FixtureGenerator
+
+
+# Seis clubes con mayores (domingo) y juveniles (sábado): 10 fechas por división.
+# Club A y Club B comparten el estadio "Compartido"; A, B y C son de Tandil
+EQUIPOS = [
+    {"nombre": f"Club {letra}", "localidad": localidad, "estadioLocal": estadio,
+     "categorias": {"primera": True, "quinta": True}}
+    for letra, localidad, estadio in [
+        ("A", "Tandil", "Compartido"),
+        ("B", "Tandil", "Compartido"),
+        ("C", "Tandil", "Propio C"),
+        ("D", "Rauch", "Propio D"),
+        ("E", "Rauch", "Propio E"),
+        ("F", "Rauch", "Propio F"),
+    ]
+]
+FECHAS = 10
+
+
+def _generador(capacidades):
+    # Arma el generador desde un equipos.json temporal, sin resolver
+    with tempfile.TemporaryDirectory() as directorio:
+        path = os.path.join(directorio, "equipos.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"equipos": EQUIPOS, "reglas": [], "capacidades": capacidades}, f)
+        return FixtureGenerator(path)
+
+
+def _modelo(capacidades):
+    generador = _generador(capacidades)
+    model = generador.build_model()
+    return generador, model
+
+
+def _excesos(generador):
+    return [p.expression.name for p in generador.penalties]
+
+
+def test_capacidad_hard_agrega_restricciones():
+    _, base = _modelo([])
+    generador, model = _modelo([{"estadioLocal": "Compartido", "maxLocalesPorFecha": 1, "tipo": "HARD"}])
+
+    # Una restricción por fecha y por día (sábado y domingo), sin penalidades
+    assert len(model.Proto().constraints) - len(base.Proto().constraints) == FECHAS * 2
+    assert generador.penalties == []
+
+
+def test_capacidad_soft_penaliza_con_peso():
+    generador, _ = _modelo([{"estadioLocal": "Compartido", "maxLocalesPorFecha": 1, "tipo": "SOFT", "peso": 700}])
+
+    assert len(generador.penalties) == FECHAS * 2
+    assert all(p.coefficient == 700 * 1000000 for p in generador.penalties)
+    assert all(nombre.startswith("exceso_cap0_") for nombre in _excesos(generador))
+
+
+def test_capacidad_con_dia_solo_aplica_ese_dia():
+    generador, _ = _modelo([{"estadioLocal": "Compartido", "dia": "DOMINGO", "maxLocalesPorFecha": 1}])
+
+    assert len(generador.penalties) == FECHAS
+    assert all(nombre.endswith("_DOMINGO") for nombre in _excesos(generador))
+
+
+def test_capacidad_localidad_cuenta_clubes():
+    # Tandil tiene 3 clubes: con máximo 2 hay un tope por fecha; con máximo 3 no hace falta
+    generador, _ = _modelo([{"localidad": "Tandil", "maxLocalesPorFecha": 2, "tipo": "SOFT"}])
+    assert len(generador.penalties) == FECHAS
+
+    generador, _ = _modelo([{"localidad": "Tandil", "maxLocalesPorFecha": 3, "tipo": "SOFT"}])
+    assert generador.penalties == []
+
+
+def test_solve_usa_la_fase_1_si_la_fase_2_no_encuentra_nada():
+    generador = _generador([{"estadioLocal": "Compartido", "maxLocalesPorFecha": 1}])
+
+    # La segunda llamada (objetivo completo) vuelve UNKNOWN como si se hubiera quedado sin tiempo
+    original = cp_model.CpSolver.Solve
+    llamadas = []
+
+    def solve_fase_2_vacia(solver, model, *args, **kwargs):
+        status = original(solver, model, *args, **kwargs)
+        llamadas.append(status)
+        return cp_model.UNKNOWN if len(llamadas) == 2 else status
+
+    cp_model.CpSolver.Solve = solve_fase_2_vacia
+    try:
+        fechas, status = generador.solve()
+    finally:
+        cp_model.CpSolver.Solve = original
+
+    assert len(llamadas) == 2
+    assert status in ("OPTIMAL", "FEASIBLE")
+    # Fixture completo: 15 partidos por división en la ida y 15 en la vuelta
+    assert sum(len(f["partidos"]) for f in fechas) == 2 * 30
+
+
+def test_capacidad_invalida():
+    # Errores de tipeo que antes apagaban el tope (o lo pasaban a SOFT) sin avisar
+    for capacidad in [
+        {"estadioLocal": "Compartido", "dia": "domingo"},
+        {"estadioLocal": "Compartido", "tipo": "hard"},
+        {"maxLocalesPorFecha": 1},
+        {"localidad": "Tandil", "estadioLocal": "Compartido"},
+        {"localidad": "Tandil", "dia": "DOMINGO"},
+        {"estadioLocal": "Compartido", "maxLocalesPorFecha": "1"},
+        {"estadioLocal": "Compartido", "peso": 0.5},
+    ]:
+        try:
+            _generador([capacidad])
+        except ValueError:
+            continue
+        raise AssertionError(f"No rechazó {capacidad}")
+
+
+if __name__ == "__main__":
+    for nombre, test in list(globals().items()):
+        if nombre.startswith("test_"):
+            test()
+            print(f"OK {nombre}")
@@ -0,0 +1,162 @@
+import contextlib
+import os
+import tempfile
+
+import fixture_store
+
+
+FECHAS = [
+    {"nroFecha": 1, "liga": "MAYORES-A", "partidos": [
+        {"local": "Santamarina", "visitante": "Independiente", "cancha": "Predio Centenario"},
+        {"local": "UNICEN", "visitante": "Juarense", "cancha": "La Movediza"},
+    ]},
+    {"nroFecha": 2, "liga": "MAYORES-A", "partidos": [
+        {"local": "Independiente", "visitante": "UNICEN", "cancha": "Agustin F Berroeta"},
+        {"local": "Juarense", "visitante": "Santamarina", "cancha": "Gaston Lafon"},
+    ]},
+    {"nroFecha": 1, "liga": "MAYORES-B", "partidos": [
+        {"local": "Oficina", "visitante": "Grupo Universitario", "cancha": "Predio Centenario"},
+    ]},
+]
+
+
+@contextlib.contextmanager
+def _store_temporal():
+    # Cada test arranca con una base vacía propia; al salir se restaura el engine del módulo
+    anterior = fixture_store.engine
+    with tempfile.TemporaryDirectory() as directorio:
+        fixture_store.engine = fixture_store.crear_engine(f"sqlite:///{os.path.join(directorio, 'fixture.db')}")
+        try:
+            fixture_store.init_store()
+            yield
+        finally:
+            fixture_store.engine.dispose()
+            fixture_store.engine = anterior
+
+
+def _partidos(rows):
+    return [(r.liga, r.nroFecha, r.local, r.visitante) for r in rows]
+
+
+def test_calendario_equipo_local_y_visitante():
+    with _store_temporal():
+        fixture_store.guardar_fixture("job-1", FECHAS)
+
+        assert _partidos(fixture_store.calendario_equipo("Independiente")) == [
+            ("MAYORES-A", 1, "Santamarina", "Independiente"),
+            ("MAYORES-A", 2, "Independiente", "UNICEN"),
+        ]
+        assert fixture_store.calendario_equipo("No existe") == []
+
+
+def test_consultas_usan_la_ultima_version():
+    with _store_temporal():
+        v1 = fixture_store.guardar_fixture("job-1", FECHAS)
+        v2 = fixture_store.guardar_fixture("job-2", FECHAS[:1])
+
+        assert fixture_store.listar_versiones()[0].id == v2
+        assert len(fixture_store.calendario_equipo("Juarense")) == 1
+        assert len(fixture_store.calendario_equipo("Juarense", v1)) == 2
+
+
+def test_ocupacion_cancha():
+    with _store_temporal():
+        fixture_store.guardar_fixture("job-1", FECHAS)
+
+        assert _partidos(fixture_store.ocupacion_cancha("Predio Centenario")) == [
+            ("MAYORES-A", 1, "Santamarina", "Independiente"),
+            ("MAYORES-B", 1, "Oficina", "Grupo Universitario"),
+        ]
+        assert fixture_store.ocupacion_cancha("Predio Centenario", nro_fecha=2) == []
+
+
+def test_partidos_liga_en_orden_del_fixture():
+    with _store_temporal():
+        fixture_store.guardar_fixture("job-1", FECHAS)
+
+        assert _partidos(fixture_store.partidos_liga("MAYORES-A")) == [
+            ("MAYORES-A", 1, "Santamarina", "Independiente"),
+            ("MAYORES-A", 1, "UNICEN", "Juarense"),
+            ("MAYORES-A", 2, "Independiente", "UNICEN"),
+            ("MAYORES-A", 2, "Juarense", "Santamarina"),
+        ]
+        assert fixture_store.partidos_liga("MAYORES-C") == []
+
+
+def test_iter_partidos_filtros():
+    with _store_temporal():
+        fixture_store.guardar_fixture("job-1", FECHAS)
+
+        assert len(list(fixture_store.iter_partidos())) == 5
+        assert len(list(fixture_store.iter_partidos(ligas=["MAYORES-B"]))) == 1
+        assert _partidos(fixture_store.iter_partidos(ligas=["MAYORES-A"], equipos={"UNICEN"}, lote=1)) == [
+            ("MAYORES-A", 1, "UNICEN", "Juarense"),
+            ("MAYORES-A", 2, "Independiente", "UNICEN"),
+        ]
+
+
+def test_escritura_durante_un_export_en_streaming():
+    # Un export a medio descargar no debe bloquear guardar_fixture (journal WAL)
+    with _store_temporal():
+        v1 = fixture_store.guardar_fixture("job-1", FECHAS)
+        stream = fixture_store.iter_partidos(lote=1)
+        primero = next(stream)
+
+        v2 = fixture_store.guardar_fixture("job-2", FECHAS)
+
+        # El stream sigue leyendo su versión hasta el final
+        resto = list(stream)
+        assert {r.versionId for r in [primero, *resto]} == {v1}
+        assert len(resto) + 1 == 5
+        assert fixture_store.listar_versiones()[0].id == v2
+
+
+def test_diff_versiones():
+    with _store_temporal():
+        v1 = fixture_store.guardar_fixture("job-1", FECHAS)
+
+        nuevas = [
+            {"nroFecha": 1, "liga": "MAYORES-A", "partidos": [
+                # Cambia de cancha
+                {"local": "Santamarina", "visitante": "Independiente", "cancha": "Damaso Latasa"},
+            ]},
+            {"nroFecha": 2, "liga": "MAYORES-A", "partidos": [
+                # Cambia de fecha (antes era la 1)
+                {"local": "UNICEN", "visitante": "Juarense", "cancha": "La Movediza"},
+                {"local": "Juarense", "visitante": "Santamarina", "cancha": "Gaston Lafon"},
+                # Partido nuevo
+                {"local": "Independiente", "visitante": "Juarense", "cancha": "Agustin F Berroeta"},
+            ]},
+        ]
+        v2 = fixture_store.guardar_fixture("job-2", nuevas)
+
+        diff = fixture_store.diff_versiones(v1, v2)
+        assert [(p["local"], p["visitante"]) for p in diff["agregados"]] == [("Independiente", "Juarense")]
+        assert sorted((p["local"], p["visitante"]) for p in diff["eliminados"]) == [
+            ("Independiente", "UNICEN"),
+            ("Oficina", "Grupo Universitario"),
+        ]
+        assert [
+            (m["local"], m["nroFechaAntes"], m["nroFechaDespues"], m["canchaAntes"], m["canchaDespues"])
+            for m in diff["modificados"]
+        ] == [
+            ("Santamarina", 1, 1, "Predio Centenario", "Damaso Latasa"),
+            ("UNICEN", 1, 2, "La Movediza", "La Movediza"),
+        ]
+
+        vacio = fixture_store.diff_versiones(v1, v1)
+        assert vacio["agregados"] == vacio["eliminados"] == vacio["modificados"] == []
+
+
+def test_sembrar_si_vacio_solo_una_vez():
+    with _store_temporal():
+        assert fixture_store.sembrar_si_vacio("fixture.json", FECHAS, "INICIAL") is not None
+        assert fixture_store.sembrar_si_vacio("fixture.json", FECHAS, "INICIAL") is None
+        assert len(fixture_store.listar_versiones()) == 1
+
+
+if __name__ == "__main__":
+    for nombre, test in list(globals().items()):
+        if nombre.startswith("test_"):
+            test()
+            print(f"OK {nombre}")